@@ -46,7 +46,7 @@ A complex GIMP 3 plugin that combines multiple effects to recreate the feel of r
 the original version, simplified, converted to Gimp 3 Python and modified to use Gegl operations.
 '''
 
-import sys, math, gi
+import sys, os, math, json, shutil, statistics, time, gi
 
 gi.require_version('Gegl', '0.4')
 gi.require_version("Gimp", "3.0")
@@ -88,13 +88,92 @@ populate_choice(Colors, colorList)
 Inversions = Gimp.Choice.new()
 populate_choice(Inversions, invertList)
 
+gimprcList = [("Keep", "Keep gimprc", "Save the tuned settings in the Lomo profile only"),
+              ("Write", "Write to gimprc", "Also write the tuned settings to gimprc, backing up the original first"),
+              ("Restore", "Restore gimprc", "Put back the gimprc that was backed up before Lomo tuning changed it")
+]
+
+GimprcActions = Gimp.Choice.new()
+populate_choice(GimprcActions, gimprcList)
+
+# Fast paths checked by lomo-accuracy as (name, Lomo settings, setting that switches the fast path on). Each is
+# rendered over the same synthetic images with the switch off, which is the reference, and on.
+fastPathList = [("Redscale", {'colorScheme': "Redscale", 'grain': False}, 'fastRedscale'),
+                ("Redscale, Invert A", {'colorScheme': "Redscale", 'grain': False, 'inversion': "InvertA"}, 'fastRedscale'),
+                ("Redscale, Invert B", {'colorScheme': "Redscale", 'grain': False, 'inversion': "InvertB"}, 'fastRedscale'),
+                ("Redscale, Grain", {'colorScheme': "Redscale", 'grain': True}, 'fastRedscale')
+]
+
+# Synthetic images used by lomo-accuracy as (plasma seed, precision). The linear float image checks each fast
+# path at high bit depth, where the sRGB curves wrapper behaves differently.
+corpusList = [(0, Gimp.Precision.U8_NON_LINEAR),
+              (1, Gimp.Precision.U8_NON_LINEAR),
+              (2, Gimp.Precision.FLOAT_LINEAR)
+]
+
+# Files owned by lomo-tune in the GIMP profile folder
+geglProfileFile = 'lomo-gegl-profile.json'
+gimprcBackupFile = 'gimprc.lomo-backup'
+
 class Lomo(Gimp.PlugIn):
   def do_query_procedures(self):
-    return ["lomo"]
+    return ["lomo", "lomo-tune", "lomo-accuracy"]
   def do_create_procedure(self, name):
     Gegl.init(None)
     Babl.init()
 
+    # lomo-tune works on its own synthetic image, so it does not need an open image and can be run
+    # headless from gimp-console
+    if name == "lomo-tune":
+      proc = Gimp.Procedure.new(
+        self,
+        name,
+        Gimp.PDBProcType.PLUGIN,
+        self.tune,
+        None
+      )
+      proc.add_enum_argument("run-mode", "Run Mode", "The run mode", Gimp.RunMode, Gimp.RunMode.NONINTERACTIVE, GObject.ParamFlags.READWRITE)
+      proc.set_menu_label("Lomo Performance Tuning")
+      proc.add_menu_path("<Image>/Filters/Simon")
+      proc.set_documentation("Finds the fastest GEGL thread count for the Lomo plugin on this machine",
+                            "Renders the Lomo base layer filters as a GEGL graph on a synthetic image with candidate thread counts. " \
+                            "A thread count that is clearly faster than the current one is saved in the Lomo profile. It is only " \
+                            "written to gimprc, after backing up the original, when 'Write to gimprc' is chosen. 'Restore gimprc' " \
+                            "puts the backup back.",
+                            name)
+      proc.set_attribution("Simon Bland", "copyright Simon Bland", "2026")
+      proc.add_int_argument("size", "Test Image Size", "Width and height of the synthetic test image in pixels", 256, 8192, 2048, GObject.ParamFlags.READWRITE)
+      proc.add_int_argument("repeats", "Timed Runs", "Number of timed renders of each candidate setting", 3, 20, 5, GObject.ParamFlags.READWRITE)
+      proc.add_choice_argument("gimprc", "gimprc", "Whether to change gimprc", GimprcActions, "Keep", GObject.ParamFlags.READWRITE)
+
+      return proc
+
+    # lomo-accuracy works on its own synthetic images, so it does not need an open image and can be run
+    # headless from gimp-console
+    if name == "lomo-accuracy":
+      proc = Gimp.Procedure.new(
+        self,
+        name,
+        Gimp.PDBProcType.PLUGIN,
+        self.accuracy,
+        None
+      )
+      proc.add_enum_argument("run-mode", "Run Mode", "The run mode", Gimp.RunMode, Gimp.RunMode.NONINTERACTIVE, GObject.ParamFlags.READWRITE)
+      proc.set_menu_label("Lomo Accuracy Check")
+      proc.add_menu_path("<Image>/Filters/Simon")
+      proc.set_documentation("Compares each Lomo fast path against the reference output",
+                            "Renders a fixed set of synthetic images through the reference Lomo path and through each fast path, " \
+                            "and reports the CIEDE2000 color difference next to the speedup and layer memory saving. " \
+                            "A fast path fails if any of its color differences exceeds the given limits.",
+                            name)
+      proc.set_attribution("Simon Bland", "copyright Simon Bland", "2026")
+      proc.add_int_argument("size", "Test Image Size", "Width and height of the synthetic test images in pixels", 64, 1024, 256, GObject.ParamFlags.READWRITE)
+      proc.add_double_argument("maxMean", "Max Mean dE", "Largest allowed mean CIEDE2000 difference", 0.0, 100.0, 1.0, GObject.ParamFlags.READWRITE)
+      proc.add_double_argument("maxP95", "Max 95% dE", "Largest allowed 95th percentile CIEDE2000 difference", 0.0, 100.0, 2.3, GObject.ParamFlags.READWRITE)
+      proc.add_double_argument("maxPeak", "Max Peak dE", "Largest allowed CIEDE2000 difference for any pixel", 0.0, 100.0, 5.0, GObject.ParamFlags.READWRITE)
+
+      return proc
+
     proc = Gimp.ImageProcedure.new(
       self,
       name,
@@ -124,6 +203,8 @@ class Lomo(Gimp.PlugIn):
     proc.add_boolean_argument("dblVignette", "Extra Vignette", "Apply an extra layer of fixed vignette", True, GObject.ParamFlags.READWRITE)
     proc.add_boolean_argument("blackVignette", "Dark Vignette", "Apply an editable, opaque dark vignette", True, GObject.ParamFlags.READWRITE)
     proc.add_double_argument("blkVignette", "Dark Vig Size", "Size of the dark vignette as a proportion of the image radial", 0.0, 2.0, 1.417, GObject.ParamFlags.READWRITE)                  
+    proc.add_boolean_argument("fastRedscale", "Single-pass Redscale", "Render Redscale as one filter on the base layer instead of an extra layer, mask and curves. " \
+                              "The layered version is used when a LAB inversion or grain is applied", False, GObject.ParamFlags.READWRITE)
 
     return proc
 
@@ -159,7 +240,8 @@ class Lomo(Gimp.PlugIn):
                   'vignetteSize',
                   'dblVignette',
                   'blackVignette',
-                  'blkVignette'
+                  'blkVignette',
+                  'fastRedscale'
       ])
 
       if not dialog.run():
@@ -176,6 +258,160 @@ class Lomo(Gimp.PlugIn):
       else:
         dialog.destroy()
 
+    # Warn if a thread count written to gimprc by lomo-tune is not in use
+    self.CheckGeglProfile()
+
+    self.ApplyEffects(image, config)
+
+    # Restore context and close the undo group
+    Gimp.displays_flush()
+    Gimp.context_pop()
+    image.undo_group_end()
+
+    # Clean up Gegl
+    Gegl.exit()
+
+    return procedure.new_return_values(Gimp.PDBStatusType.SUCCESS, None)
+
+  def tune(self, procedure, config, data):
+    Gegl.init(None)
+    Babl.init()
+
+    run_mode = config.get_property('run-mode')
+    if run_mode == Gimp.RunMode.INTERACTIVE:
+      GimpUi.init('lomodev')
+
+      dialog = GimpUi.ProcedureDialog(procedure=procedure, config=config)
+      dialog.fill(['size', 'repeats', 'gimprc'])
+
+      if not dialog.run():
+        dialog.destroy()
+        Gegl.exit()
+
+        return procedure.new_return_values(Gimp.PDBStatusType.CANCEL, None)
+
+      else:
+        dialog.destroy()
+
+    size = config.get_property('size')
+    repeats = config.get_property('repeats')
+    gimprc = config.get_property('gimprc')
+
+    # Undo an earlier write to gimprc without running the benchmark
+    if gimprc == "Restore":
+      if self.RestoreGimprc():
+        Gimp.message("gimprc has been restored from the backup made by Lomo tuning. Restart GIMP for it to take effect.")
+      else:
+        Gimp.message("There is no gimprc backup from Lomo tuning to restore.")
+
+      Gegl.exit()
+
+      return procedure.new_return_values(Gimp.PDBStatusType.SUCCESS, None)
+
+    # The Lomo chain is benchmarked with its default settings. The chain is rendered here in the plug-in
+    # because GIMP core renders layers and filters with the settings it read from gimprc at start up, which
+    # cannot be changed while it is running.
+    lomoConfig = Gimp.get_pdb().lookup_procedure('lomo').create_config()
+    source = self.SyntheticBuffer(size, size)
+
+    # Plug-ins start with the same GEGL settings as GIMP core, so this is the thread count GIMP is using
+    geglConfig = Gegl.config()
+    original = geglConfig.get_property('threads')
+
+    # Warm up caches and GEGL operations before anything is timed
+    self.TimeChain(source, lomoConfig)
+
+    trials = [original] + [threads for threads in self.ThreadCandidates() if threads != original]
+    times = self.TimeCandidates(source, lomoConfig, trials, repeats)
+    geglConfig.set_property('threads', original)
+
+    # Only take a new thread count if it is clearly faster: by more than 5% and by more than the
+    # run-to-run spread of the current setting
+    baseTime = statistics.median(times[0])
+    spread = max(times[0]) - min(times[0])
+    best, bestTime = original, baseTime
+    for (threads, trialTimes) in zip(trials[1:], times[1:]):
+      trialTime = statistics.median(trialTimes)
+      if trialTime < bestTime * 0.95 and bestTime - trialTime > spread:
+        best, bestTime = threads, trialTime
+
+    # The result is always kept in the Lomo profile. gimprc is only changed when asked to, and only
+    # when the tuned value differs from the one GIMP is using.
+    profile = self.LoadGeglProfile()
+    profile['threads'] = best
+
+    if best == original:
+      Gimp.message("Lomo tuning: {0} threads is already the fastest setting found ({1:.2f}s). gimprc was not changed.".format(
+                   original, baseTime))
+
+    elif gimprc == "Write":
+      self.WriteGimprc({'num-processors': str(best)})
+      profile['gimprcThreads'] = best
+      Gimp.message("Lomo tuning: {0} threads renders the Lomo base layer in {1:.2f}s, against {2:.2f}s with {3}. " \
+                   "num-processors was written to gimprc and the original was backed up to {4}. Restart GIMP for it " \
+                   "to take effect. Run Lomo Performance Tuning with 'Restore gimprc' to undo the change.".format(
+                     best, bestTime, baseTime, original, gimprcBackupFile))
+
+    else:
+      Gimp.message("Lomo tuning: {0} threads renders the Lomo base layer in {1:.2f}s, against {2:.2f}s with {3}. " \
+                   "The result was saved in {4} and gimprc was not changed. Run Lomo Performance Tuning with " \
+                   "'Write to gimprc' to use it.".format(best, bestTime, baseTime, original, geglProfileFile))
+
+    self.SaveGeglProfile(profile)
+    Gegl.exit()
+
+    return procedure.new_return_values(Gimp.PDBStatusType.SUCCESS, None)
+
+  def accuracy(self, procedure, config, data):
+    Gegl.init(None)
+    Babl.init()
+
+    run_mode = config.get_property('run-mode')
+    if run_mode == Gimp.RunMode.INTERACTIVE:
+      GimpUi.init('lomodev')
+
+      dialog = GimpUi.ProcedureDialog(procedure=procedure, config=config)
+      dialog.fill(['size', 'maxMean', 'maxP95', 'maxPeak'])
+
+      if not dialog.run():
+        dialog.destroy()
+        Gegl.exit()
+
+        return procedure.new_return_values(Gimp.PDBStatusType.CANCEL, None)
+
+      else:
+        dialog.destroy()
+
+    size = config.get_property('size')
+    limits = (config.get_property('maxMean'), config.get_property('maxP95'), config.get_property('maxPeak'))
+
+    report = []
+    rejected = []
+    for (name, settings, switch) in fastPathList:
+      # Each fast path starts from the default Lomo settings
+      lomoConfig = Gimp.get_pdb().lookup_procedure('lomo').create_config()
+      for (setting, value) in settings.items():
+        lomoConfig.set_property(setting, value)
+
+      (mean, p95, peak, speedup, saving) = self.CompareFastPath(lomoConfig, switch, size)
+
+      passed = mean <= limits[0] and p95 <= limits[1] and peak <= limits[2]
+      if not passed:
+        rejected.append(name)
+
+      report.append("{0}: dE2000 mean {1:.2f}, 95% {2:.2f}, max {3:.2f}; {4:.2f}x speed, {5:.0%} less layer memory - {6}".format(
+                    name, mean, p95, peak, speedup, saving, "accepted" if passed else "REJECTED"))
+
+    Gimp.message("\n".join(report))
+    Gegl.exit()
+
+    if rejected:
+      error = GLib.Error.new_literal(Gimp.PlugIn.error_quark(), "Fast paths over the dE2000 limits: " + ", ".join(rejected), 0)
+      return procedure.new_return_values(Gimp.PDBStatusType.EXECUTION_ERROR, error)
+
+    return procedure.new_return_values(Gimp.PDBStatusType.SUCCESS, None)
+
+  def ApplyEffects(self, image, config):
     # Get dialog variables
     saturation = config.get_property('saturation')
     contrast = config.get_property('contrast')
@@ -191,6 +427,7 @@ class Lomo(Gimp.PlugIn):
     dblVignette = config.get_property('dblVignette')
     blackVignette = config.get_property('blackVignette')
     blkVignette = config.get_property('blkVignette')
+    fastRedscale = config.get_property('fastRedscale')
 
     #
     # --- Calculate image dimensions, some common coordinates and basic settings ---
@@ -311,31 +548,12 @@ class Lomo(Gimp.PlugIn):
         self.sRGBCurvesSpline(baseLayer, Gimp.HistogramChannel.GREEN, [0, 5/255, 160/255, 166/255, 1.0, 1.0])
 
       case "Redscale":
-      # The order of layer operations is important in this scheme
-        blueLayer = self.AddLayerFromVisible(image, "Blue Filter")
-
-        filter = Gimp.DrawableFilter.new(baseLayer, "gegl:channel-mixer", "Channel Mixer")
-        config = filter.get_config()
-        config.set_property('preserve-luminosity', True)
-        config.set_property('rr-gain', 1.0)
-        config.set_property('rg-gain', 0.0)
-        config.set_property('rb-gain', 0.0)
-        config.set_property('gr-gain', 0.0)
-        config.set_property('gg-gain', 0.0)
-        config.set_property('gb-gain', 0.0)
-        config.set_property('br-gain', 0.0)
-        config.set_property('bg-gain', 0.0)
-        config.set_property('bb-gain', 0.0)
-        filter.update()
-        baseLayer.append_filter(filter)
-
-        self.SetOpacityModeCombo(blueLayer, 40, Gimp.LayerMode.SCREEN)
-        self.AddMask(blueLayer, Gimp.AddMaskType.COPY)
-        self.FillWithColor(blueLayer, 0, 0, 1.0)
-             
-        self.sRGBCurvesSpline(baseLayer, Gimp.HistogramChannel.RED, [0, 0, 127/255, 190/255, 1.0, 1.0])
-        self.sRGBCurvesSpline(baseLayer, Gimp.HistogramChannel.GREEN, [0, 0, 127/255, 62/255, 240/255, 1.0])
-        self.sRGBCurvesSpline(baseLayer, Gimp.HistogramChannel.BLUE, [0, 0, 1.0, 0])
+        # The single pass keeps the blue screen on the base layer, where a LAB inversion or grain would also
+        # change it, so the layered version is used whenever either is applied
+        if fastRedscale and inversion == "None" and not grain:
+          self.Redscale(baseLayer)
+        else:
+          self.RedscaleLayers(image, baseLayer)
 
       case "Retro B/W":
         baseLayer.desaturate(Gimp.DesaturateMode.LUMINANCE)
@@ -416,15 +634,7 @@ class Lomo(Gimp.PlugIn):
       oeLayer.edit_gradient_fill(Gimp.GradientType.RADIAL, offset, False, 1, 0, True, centerX, centerY, 0, 0)
       self.NoiseSpread(oeLayer)
 
-    # Restore context and close the undo group
-    Gimp.displays_flush()
-    Gimp.context_pop()
-    image.undo_group_end()
-
-    # Clean up Gegl
-    Gegl.exit()
-
-    return procedure.new_return_values(Gimp.PDBStatusType.SUCCESS, None)
+    return
 
   #
   # --- Methods for Gegl effects and PDB plugins ---
@@ -562,6 +772,61 @@ class Lomo(Gimp.PlugIn):
     result = procedure.run(config)
     return result
   
+  def Redscale(self, layer):
+    # Single pass version of RedscaleLayers, which screens a masked blue layer made from the visible image over
+    # a red-only channel mix and then runs three sRGB curves. Every step only depends on the pixel itself, so the
+    # whole look is one chain of point operations in linear light. The red curve needs a different exponent per
+    # channel, which is only possible with aux color inputs, so the chain is a gegl:gegl graph rather than
+    # separate named filters. Green and blue pass through the gamma and invert stages unchanged.
+    stages = [
+      # Channel mixer: red is kept and green is removed, as in the original mix and its green curve. Blue is
+      # 0.4 x Rec. 709 luminance, which is the 40% screen of pure blue through the luminance COPY mask.
+      "gegl:channel-mixer preserve-luminosity=false rr-gain=1 rg-gain=0 rb-gain=0 gr-gain=0 gg-gain=0 gb-gain=0 " \
+      "br-gain=0.08504 bg-gain=0.28608 bb-gain=0.02888",
+      # Red curve 0,0 127,190 255,255, fitted in linear light as (1 - (1 - r^0.84)^2.7)^1.25
+      "gegl:gamma aux=[ gegl:color value=rgb(0.84,1,1) ]",
+      "gegl:invert-linear",
+      "gegl:gamma aux=[ gegl:color value=rgb(2.7,1,1) ]",
+      "gegl:invert-linear",
+      "gegl:gamma aux=[ gegl:color value=rgb(1.25,1,1) ]"
+    ]
+    chain = " ".join(stages)
+
+    filter = Gimp.DrawableFilter.new(layer, "gegl:gegl", "Redscale")
+    config = filter.get_config()
+    config.set_property('string', chain)
+    filter.update()
+    layer.append_filter(filter)
+    return
+
+  def RedscaleLayers(self, image, baseLayer):
+    # The order of layer operations is important in this scheme
+    blueLayer = self.AddLayerFromVisible(image, "Blue Filter")
+
+    filter = Gimp.DrawableFilter.new(baseLayer, "gegl:channel-mixer", "Channel Mixer")
+    config = filter.get_config()
+    config.set_property('preserve-luminosity', True)
+    config.set_property('rr-gain', 1.0)
+    config.set_property('rg-gain', 0.0)
+    config.set_property('rb-gain', 0.0)
+    config.set_property('gr-gain', 0.0)
+    config.set_property('gg-gain', 0.0)
+    config.set_property('gb-gain', 0.0)
+    config.set_property('br-gain', 0.0)
+    config.set_property('bg-gain', 0.0)
+    config.set_property('bb-gain', 0.0)
+    filter.update()
+    baseLayer.append_filter(filter)
+
+    self.SetOpacityModeCombo(blueLayer, 40, Gimp.LayerMode.SCREEN)
+    self.AddMask(blueLayer, Gimp.AddMaskType.COPY)
+    self.FillWithColor(blueLayer, 0, 0, 1.0)
+
+    self.sRGBCurvesSpline(baseLayer, Gimp.HistogramChannel.RED, [0, 0, 127/255, 190/255, 1.0, 1.0])
+    self.sRGBCurvesSpline(baseLayer, Gimp.HistogramChannel.GREEN, [0, 0, 127/255, 62/255, 240/255, 1.0])
+    self.sRGBCurvesSpline(baseLayer, Gimp.HistogramChannel.BLUE, [0, 0, 1.0, 0])
+    return
+
   def SetContrast(self, layer, contrast):
     filter = Gimp.DrawableFilter.new(layer, "gegl:brightness-contrast", "Brightness and Contrast")
     config = filter.get_config()
@@ -603,6 +868,326 @@ class Lomo(Gimp.PlugIn):
     layer.append_filter(filter)
     return
 
+  #
+  # --- GEGL tuning ---
+  #
+
+  #times every candidate thread count with the runs interleaved, so that drift over the session is shared
+  #evenly between candidates. Returns a list of times for each candidate.
+  def TimeCandidates(self, source, lomoConfig, trials, repeats):
+    times = [[] for trial in trials]
+
+    for run in range(repeats):
+      for (index, threads) in enumerate(trials):
+        Gegl.config().set_property('threads', threads)
+        times[index].append(self.TimeChain(source, lomoConfig))
+
+    return times
+
+  #renders the base layer filters of the Lomo chain over a buffer in the plug-in and returns the time in seconds
+  def TimeChain(self, source, lomoConfig):
+    extent = source.get_extent()
+    output = Gegl.Buffer.new("R'G'B'A u8", 0, 0, extent.width, extent.height)
+
+    graph = Gegl.Node()
+    previous = graph.create_child("gegl:buffer-source")
+    previous.set_property('buffer', source)
+
+    for (operation, properties) in self.ChainOperations(lomoConfig):
+      node = graph.create_child(operation)
+      for (name, value) in properties.items():
+        node.set_property(name, value)
+      previous.link(node)
+      previous = node
+
+    sink = graph.create_child("gegl:write-buffer")
+    sink.set_property('buffer', output)
+    previous.link(sink)
+
+    start = time.perf_counter()
+    sink.process()
+    return time.perf_counter() - start
+
+  #the GEGL operations and settings that ApplyEffects adds to the base layer as DrawableFilters
+  def ChainOperations(self, lomoConfig):
+    wideAngle = lomoConfig.get_property('wideAngle')
+    lensBlur = lomoConfig.get_property('lensBlur')
+    edgeBlur = lomoConfig.get_property('edgeBlur')
+
+    operations = [("gegl:brightness-contrast", {'contrast': lomoConfig.get_property('contrast'), 'brightness': 0.0}),
+                  ("gegl:saturation", {'scale': lomoConfig.get_property('saturation')}),
+                  ("gegl:lens-distortion", {'main': wideAngle, 'edge': wideAngle * 0.25, 'zoom': wideAngle * 0.80, 'brighten': 0.0})
+    ]
+
+    if lensBlur > 0:
+      operations.append(("gegl:gaussian-blur", {'std-dev-x': lensBlur, 'std-dev-y': lensBlur, 'clip-extent': True}))
+
+    if edgeBlur > 0:
+      operations.append(("gegl:focus-blur", {'blur-type': 1,   # Enum: LENS_BLUR
+                                             'blur-radius': edgeBlur,
+                                             'highlight-factor': 0.35,
+                                             'highlight-threshold-low': 0.310,
+                                             'highlight-threshold-high': 1.0}))
+
+    if lomoConfig.get_property('sharpness'):
+      operations.append(("gegl:unsharp-mask", {'std-dev': 2.0, 'scale': 0.0, 'threshold': 0.0}))
+
+    if lomoConfig.get_property('grain'):
+      operations.append(("gegl:noise-hsv", {'holdness': 4, 'hue-distance': 0.0, 'saturation-distance': 0.0, 'value-distance': 0.30}))
+
+    return operations
+
+  #renders plasma into a buffer in the plug-in, so the benchmark does not depend on an image in GIMP core
+  def SyntheticBuffer(self, w, h, seed = 0):
+    buffer = Gegl.Buffer.new("R'G'B'A u8", 0, 0, w, h)
+
+    graph = Gegl.Node()
+    plasma = graph.create_child("gegl:plasma")
+    plasma.set_property('seed', seed)
+    plasma.set_property('turbulence', 1.0)
+    plasma.set_property('width', w)
+    plasma.set_property('height', h)
+
+    sink = graph.create_child("gegl:write-buffer")
+    sink.set_property('buffer', buffer)
+    plasma.link(sink)
+    sink.process()
+
+    return buffer
+
+  #candidate thread counts scaled to the cores this process may run on. Tile cache size and swap location
+  #are not tuned, as the benchmark working set never fills the cache or swaps.
+  def ThreadCandidates(self):
+    try:
+      cpus = len(os.sched_getaffinity(0))   # honours affinity and cpuset limits on render nodes
+    except AttributeError:
+      cpus = os.cpu_count() or 1
+
+    cpus = min(cpus, 64)   # GEGL allows at most 64 threads
+    return sorted({max(1, cpus // 4), max(1, cpus // 2), cpus})
+
+  def LoadGeglProfile(self):
+    try:
+      with open(os.path.join(Gimp.directory(), geglProfileFile)) as f:
+        return json.load(f)
+    except (OSError, ValueError):
+      return {}
+
+  def SaveGeglProfile(self, profile):
+    with open(os.path.join(Gimp.directory(), geglProfileFile), 'w') as f:
+      json.dump(profile, f, indent=2)
+    return
+
+  #GIMP only reads gimprc at start up and may write its own values back when preferences change, so
+  #the thread count written by lomo-tune is checked against the one GIMP is actually using
+  def CheckGeglProfile(self):
+    threads = self.LoadGeglProfile().get('gimprcThreads')
+
+    if threads and Gegl.config().get_property('threads') != threads:
+      Gimp.message("Lomo tuning wrote num-processors {0} to gimprc, but GIMP is using {1} threads. Restart GIMP, " \
+                   "or run Lomo Performance Tuning again if GIMP has overwritten gimprc.".format(
+                     threads, Gegl.config().get_property('threads')))
+    return
+
+  #writes the given tokens to the user's gimprc, replacing earlier values of the same tokens. The gimprc
+  #found on the first write is backed up so that RestoreGimprc can put it back.
+  def WriteGimprc(self, tokens):
+    path = os.path.join(Gimp.directory(), 'gimprc')
+    backup = os.path.join(Gimp.directory(), gimprcBackupFile)
+
+    try:
+      with open(path) as f:
+        lines = f.readlines()
+    except OSError:
+      lines = []
+
+    if not os.path.exists(backup):
+      with open(backup, 'w') as f:
+        f.writelines(lines)
+
+    lines = [line for line in lines if line.strip().split(' ')[0].lstrip('(') not in tokens]
+    lines += ["({0} {1})\n".format(token, value) for (token, value) in tokens.items()]
+
+    with open(path, 'w') as f:
+      f.writelines(lines)
+    return
+
+  #puts back the gimprc backed up by WriteGimprc. Returns False if there is no backup.
+  def RestoreGimprc(self):
+    backup = os.path.join(Gimp.directory(), gimprcBackupFile)
+    if not os.path.exists(backup):
+      return False
+
+    shutil.copyfile(backup, os.path.join(Gimp.directory(), 'gimprc'))
+    os.remove(backup)
+
+    profile = self.LoadGeglProfile()
+    profile.pop('gimprcThreads', None)
+    self.SaveGeglProfile(profile)
+
+    return True
+
+  #
+  # --- Accuracy harness ---
+  #
+
+  #renders the synthetic corpus with the fast path switched off and on and returns the dE2000 mean, 95th
+  #percentile and peak, the speedup and the fraction of layer memory saved by the fast path
+  def CompareFastPath(self, lomoConfig, switch, size):
+    deltas = []
+    times = {False: 0.0, True: 0.0}
+    memory = {False: 0, True: 0}
+
+    # Untimed warm-up so that cold caches and plugin start up are not charged to either path
+    for fast in (False, True):
+      lomoConfig.set_property(switch, fast)
+      self.RenderPath(lomoConfig, size, *corpusList[0])
+
+    # dE is measured on a fixed grid of at most 256 x 256 pixels per image
+    step = max(1, size // 256)
+
+    for (index, (seed, precision)) in enumerate(corpusList):
+      # Alternate which path is rendered first
+      renders = {}
+      for fast in ([False, True] if index % 2 == 0 else [True, False]):
+        lomoConfig.set_property(switch, fast)
+        renders[fast] = self.RenderPath(lomoConfig, size, seed, precision)
+
+      for fast in (False, True):
+        times[fast] += renders[fast][1]
+        memory[fast] += renders[fast][2]
+
+      refPixels = renders[False][0]
+      fastPixels = renders[True][0]
+
+      labCache = {}
+      for y in range(0, size, step):
+        for x in range(0, size, step):
+          i = (y * size + x) * 3
+          lab1 = self.SRGBToLab(refPixels[i:i + 3], labCache)
+          lab2 = self.SRGBToLab(fastPixels[i:i + 3], labCache)
+          deltas.append(self.DeltaE2000(lab1, lab2))
+
+    deltas.sort()
+    mean = sum(deltas) / len(deltas)
+    p95 = deltas[int(0.95 * (len(deltas) - 1))]
+
+    return mean, p95, deltas[-1], times[False] / max(times[True], 1e-9), 1.0 - memory[True] / memory[False]
+
+  #renders one synthetic image and returns its flattened pixels, the render time and the layer memory used
+  def RenderPath(self, lomoConfig, size, seed, precision):
+    image = self.SyntheticImage(size, size, seed, precision)
+    Gimp.context_push()
+
+    start = time.perf_counter()
+    self.ApplyEffects(image, lomoConfig)
+    memory = self.LayerMemory(image)
+    layer = image.flatten()
+    elapsed = time.perf_counter() - start
+
+    buffer = layer.get_buffer()
+    pixels = buffer.get(buffer.get_extent(), 1.0, "R'G'B' u8", Gegl.AbyssPolicy.CLAMP)
+
+    Gimp.context_pop()
+    image.delete()
+
+    return pixels, elapsed, memory
+
+  #creates an RGB image of the given precision filled with plasma, which has detail and color at every scale
+  def SyntheticImage(self, w, h, seed, precision):
+    image = Gimp.Image.new_with_precision(w, h, Gimp.ImageBaseType.RGB, precision)
+    layer = Gimp.Layer.new(image, "Synthetic", w, h, Gimp.ImageType.RGB_IMAGE, 100, Gimp.LayerMode.NORMAL)
+    image.insert_layer(layer, None, -1)
+
+    filter = Gimp.DrawableFilter.new(layer, "gegl:plasma", "Plasma")
+    config = filter.get_config()
+    config.set_property('seed', seed)
+    config.set_property('turbulence', 1.0)
+    config.set_property('width', w)
+    config.set_property('height', h)
+    filter.update()
+    layer.append_filter(filter)
+    layer.merge_filters()
+
+    return image
+
+  #bytes held by the pixels of every layer and layer mask in the image
+  def LayerMemory(self, image):
+    total = 0
+    for layer in image.get_layers():
+      total += layer.get_width() * layer.get_height() * layer.get_bpp()
+      mask = layer.get_mask()
+      if mask is not None:
+        total += mask.get_width() * mask.get_height() * mask.get_bpp()
+
+    return total
+
+  #converts an 8 bit sRGB pixel to CIE L*a*b* (D65)
+  def SRGBToLab(self, rgb, cache):
+    key = bytes(rgb)
+    if key in cache:
+      return cache[key]
+
+    r, g, b = [(c / 255 / 12.92) if c <= 10 else math.pow((c / 255 + 0.055) / 1.055, 2.4) for c in rgb]
+
+    x = (0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / 0.95047
+    y = (0.2126729 * r + 0.7151522 * g + 0.0721750 * b)
+    z = (0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / 1.08883
+
+    fx, fy, fz = [math.pow(t, 1.0/3.0) if t > 216/24389 else (24389/27 * t + 16) / 116 for t in (x, y, z)]
+
+    cache[key] = (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+    return cache[key]
+
+  #CIEDE2000 color difference (Sharma, Wu and Dalal, 2005)
+  def DeltaE2000(self, lab1, lab2):
+    (L1, a1, b1) = lab1
+    (L2, a2, b2) = lab2
+
+    cBar = (math.hypot(a1, b1) + math.hypot(a2, b2)) / 2
+    g = 0.5 * (1 - math.sqrt(math.pow(cBar, 7) / (math.pow(cBar, 7) + math.pow(25, 7))))
+    a1p = (1 + g) * a1
+    a2p = (1 + g) * a2
+    c1p = math.hypot(a1p, b1)
+    c2p = math.hypot(a2p, b2)
+    h1p = math.degrees(math.atan2(b1, a1p)) % 360 if c1p else 0.0
+    h2p = math.degrees(math.atan2(b2, a2p)) % 360 if c2p else 0.0
+
+    dLp = L2 - L1
+    dCp = c2p - c1p
+    dhp = 0.0
+    if c1p * c2p:
+      dhp = h2p - h1p
+      if dhp > 180:
+        dhp -= 360
+      elif dhp < -180:
+        dhp += 360
+    dHp = 2 * math.sqrt(c1p * c2p) * math.sin(math.radians(dhp / 2))
+
+    lBarp = (L1 + L2) / 2
+    cBarp = (c1p + c2p) / 2
+    hBarp = h1p + h2p
+    if c1p * c2p:
+      if abs(h1p - h2p) <= 180:
+        hBarp = (h1p + h2p) / 2
+      elif h1p + h2p < 360:
+        hBarp = (h1p + h2p + 360) / 2
+      else:
+        hBarp = (h1p + h2p - 360) / 2
+
+    t = 1 - 0.17 * math.cos(math.radians(hBarp - 30)) + 0.24 * math.cos(math.radians(2 * hBarp)) \
+          + 0.32 * math.cos(math.radians(3 * hBarp + 6)) - 0.20 * math.cos(math.radians(4 * hBarp - 63))
+    dTheta = 30 * math.exp(-math.pow((hBarp - 275) / 25, 2))
+    rc = 2 * math.sqrt(math.pow(cBarp, 7) / (math.pow(cBarp, 7) + math.pow(25, 7)))
+    sl = 1 + 0.015 * math.pow(lBarp - 50, 2) / math.sqrt(20 + math.pow(lBarp - 50, 2))
+    sc = 1 + 0.045 * cBarp
+    sh = 1 + 0.015 * cBarp * t
+    rt = -math.sin(math.radians(2 * dTheta)) * rc
+
+    return math.sqrt(math.pow(dLp / sl, 2) + math.pow(dCp / sc, 2) + math.pow(dHp / sh, 2)
+                     + rt * (dCp / sc) * (dHp / sh))
+
+
   #
   # --- Utilities ---
   #